@@ -16,86 +16,214 @@ import argparse
 import numpy as np
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
-def generate_water_box(num_molecules=27, num_frames=50):
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+
+
+# Element color palette (CPK scheme). Atoms reference palette entries by
+# index via 'element_idx'; index 0 doubles as the fallback for unknown
+# elements.
+PALETTE = [
+    {'r': 0.5, 'g': 0.5, 'b': 0.5},   # C / default: gray
+    {'r': 0.0, 'g': 0.0, 'b': 1.0},   # N: blue
+    {'r': 1.0, 'g': 0.0, 'b': 0.0},   # O: red
+    {'r': 1.0, 'g': 1.0, 'b': 0.0},   # S: yellow
+    {'r': 1.0, 'g': 0.5, 'b': 0.0},   # P: orange
+    {'r': 1.0, 'g': 1.0, 'b': 1.0},   # H: white
+    {'r': 1.0, 'g': 0.84, 'b': 0.0},  # Au: gold
+]
+PALETTE_INDEX = {'C': 0, 'N': 1, 'O': 2, 'S': 3, 'P': 4, 'H': 5, 'Au': 6}
+
+
+def write_json(data, output_file, pretty=False):
+    """
+    Write trajectory data, using orjson (Rust, NumPy-aware) when available
+
+    pretty indents the output for human inspection; it roughly doubles the
+    file size and serialization time, so it is off by default.
+    """
+    if pretty:
+        with open(output_file, 'w') as f:
+            json.dump(data, f, indent=2, default=lambda o: o.tolist())
+    elif orjson is not None:
+        Path(output_file).write_bytes(
+            orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(output_file, 'w') as f:
+            json.dump(data, f, separators=(',', ':'),
+                      default=lambda o: o.tolist())
+
+
+# Numba-compiled coordinate kernels. These fill the (frames, atoms, 3)
+# buffer with explicit loops that LLVM auto-vectorizes; the NumPy
+# broadcast expressions in the generators remain as the fallback when
+# numba is not installed. Thermal noise is drawn outside the kernels so
+# both paths stay deterministic for a given random state.
+if njit is not None:
+
+    @njit(cache=True, parallel=True, fastmath=True)
+    def _water_coords(base, ijk, wave_tab, thermal, num_frames):
+        num_atoms = base.shape[0]
+        out = np.empty((num_frames, num_atoms, 3), np.float32)
+        for f in prange(num_frames):
+            for a in range(num_atoms):
+                mol = a // 3
+                for d in range(3):
+                    out[f, a, d] = (base[a, d]
+                                    + wave_tab[f, ijk[mol, d]]
+                                    + thermal[f, mol, d])
+        return out
+
+    # The helix geometry is fixed, so the parameters live in the kernel
+    # body as float32 literals and the signature is declared explicitly:
+    # LLVM constant-folds them and compiles eagerly (cached after the
+    # first run). Keep in sync with generate_protein_backbone.
+    @njit('f4[:,:,::1](i8, i8, f4[::1], f4[:,::1])',
+          cache=True, parallel=True, fastmath=True)
+    def _helix_coords(num_residues, num_frames, breathing_tab, flex_tab):
+        rise = np.float32(0.15)
+        rot = np.float32(100 * np.pi / 180)
+        radius = np.float32(0.23)
+        angle_offsets = (np.float32(0.0), np.float32(0.3),
+                         np.float32(0.6), np.float32(0.8))
+        z_offsets = (np.float32(0.0), np.float32(0.05),
+                     np.float32(0.10), np.float32(0.12))
+        xy_shifts = (np.float32(0.0), np.float32(0.0),
+                     np.float32(0.0), np.float32(0.05))
+
+        out = np.empty((num_frames, num_residues * 4, 3), np.float32)
+        for f in prange(num_frames):
+            breathing = breathing_tab[f]
+            for res in range(num_residues):
+                flexibility = flex_tab[f, res]
+                for a in range(4):
+                    angle = res * rot + angle_offsets[a]
+                    x = radius * breathing * np.cos(angle) + xy_shifts[a]
+                    y = radius * breathing * np.sin(angle) + xy_shifts[a]
+                    if a == 0:
+                        x += flexibility
+                        y += flexibility
+                    idx = res * 4 + a
+                    out[f, idx, 0] = x
+                    out[f, idx, 1] = y
+                    out[f, idx, 2] = res * rise + z_offsets[a]
+        return out
+
+    @njit(cache=True)
+    def _bounds(coords):
+        # min/max/sum fused into one sweep over the frame; NumPy would
+        # need three separate passes
+        mn = coords[0].copy()
+        mx = coords[0].copy()
+        s = np.zeros(3)
+        for i in range(coords.shape[0]):
+            for d in range(3):
+                v = coords[i, d]
+                if v < mn[d]:
+                    mn[d] = v
+                if v > mx[d]:
+                    mx[d] = v
+                s[d] += v
+        return mn, mx, s / coords.shape[0]
+
+    @njit(cache=True, parallel=True, fastmath=True)
+    def _cluster_coords(base, radial_dirs, thermal, breathing_tab, num_frames):
+        num_atoms = base.shape[0]
+        out = np.empty((num_frames, num_atoms, 3), np.float32)
+        for f in prange(num_frames):
+            breathing = breathing_tab[f]
+            for a in range(num_atoms):
+                for d in range(3):
+                    out[f, a, d] = (base[a, d]
+                                    + breathing * radial_dirs[a, d]
+                                    + thermal[f, a, d])
+        return out
+
+
+def generate_water_box(num_molecules=27, num_frames=50, seed=None):
     """
     Generate a simple water box with thermal motion
     
     Args:
         num_molecules: Number of water molecules
         num_frames: Number of trajectory frames
+        seed: Optional seed for reproducible thermal noise
     
     Returns:
         dict: Trajectory data
     """
     print(f"Generating water box with {num_molecules} molecules, {num_frames} frames...")
-    
+
     # Water molecule geometry (Å -> nm)
     water_geometry = [
-        {'element': 'O', 'name': 'O', 'offset': np.array([0.0, 0.0, 0.0])},
-        {'element': 'H', 'name': 'H1', 'offset': np.array([0.096, 0.0, 0.0])},
-        {'element': 'H', 'name': 'H2', 'offset': np.array([-0.024, 0.093, 0.0])},
+        {'element': 'O', 'name': 'O'},
+        {'element': 'H', 'name': 'H1'},
+        {'element': 'H', 'name': 'H2'},
     ]
-    
-    # Element colors (CPK scheme)
-    colors = {
-        'O': {'r': 1.0, 'g': 0.0, 'b': 0.0},  # Red
-        'H': {'r': 1.0, 'g': 1.0, 'b': 1.0},  # White
-    }
-    
+    offsets = np.array([
+        [0.0, 0.0, 0.0],
+        [0.096, 0.0, 0.0],
+        [-0.024, 0.093, 0.0],
+    ], dtype=np.float32)
+
     # Calculate grid dimensions for molecules
     grid_size = int(np.ceil(num_molecules ** (1/3)))
     spacing = 0.3  # nm between molecules
-    
-    frames = []
-    
-    for frame_idx in range(num_frames):
-        atoms = []
-        mol_idx = 0
-        
-        for i in range(grid_size):
-            for j in range(grid_size):
-                for k in range(grid_size):
-                    if mol_idx >= num_molecules:
-                        break
-                    
-                    # Base position
-                    base_pos = np.array([
-                        i * spacing,
-                        j * spacing,
-                        k * spacing
-                    ])
-                    
-                    # Add thermal motion (small random displacement)
-                    thermal_motion = np.random.randn(3) * 0.01
-                    
-                    # Add collective motion (wave-like)
-                    wave_motion = np.array([
-                        0.02 * np.sin(frame_idx * 0.1 + i * 0.3),
-                        0.02 * np.sin(frame_idx * 0.1 + j * 0.3),
-                        0.02 * np.sin(frame_idx * 0.1 + k * 0.3)
-                    ])
-                    
-                    # Create water molecule
-                    for atom_template in water_geometry:
-                        pos = base_pos + atom_template['offset'] + thermal_motion + wave_motion
-                        
-                        atoms.append({
-                            'x': float(pos[0]),
-                            'y': float(pos[1]),
-                            'z': float(pos[2]),
-                            'element': atom_template['element'],
-                            'name': atom_template['name'],
-                            'residue': 'HOH',
-                            'chain': 'A',
-                            'color': colors[atom_template['element']]
-                        })
-                    
-                    mol_idx += 1
-        
-        frames.append(atoms)
-    
-    return create_trajectory_dict(frames, 'water_box_test')
+
+    # Grid indices (i, j, k) for each molecule, built once
+    ijk = np.stack(np.meshgrid(
+        np.arange(grid_size),
+        np.arange(grid_size),
+        np.arange(grid_size),
+        indexing='ij'
+    ), axis=-1).reshape(-1, 3)[:num_molecules]
+
+    # Base positions for every atom: (num_molecules * 3, 3)
+    base = (ijk.astype(np.float32)[:, None, :] * spacing + offsets[None, :, :]).reshape(-1, 3)
+
+    # The wave only depends on (frame, grid index); precompute the sine
+    # table once as wave_tab[frame, grid_index]
+    wave_tab = (0.02 * np.sin(np.arange(num_frames, dtype=np.float32)[:, None] * 0.1
+                              + np.arange(grid_size, dtype=np.float32)[None, :] * 0.3)
+                ).astype(np.float32)
+
+    # Thermal motion (small random displacement), drawn for all frames in
+    # one batched call; default_rng is faster than the legacy np.random API
+    rng = np.random.default_rng(seed)
+    thermal = rng.standard_normal((num_frames, num_molecules, 3),
+                                  dtype=np.float32) * np.float32(0.01)
+
+    if njit is not None:
+        coords = _water_coords(base, ijk, wave_tab, thermal, num_frames)
+    else:
+        # Collective motion (wave-like), per molecule per frame: (frames, molecules, 3)
+        wave = wave_tab[:, ijk]
+
+        # All coordinates in one broadcast: (frames, atoms, 3).
+        # Wave and thermal displacements apply per molecule, so repeat across
+        # the 3 atoms of each water.
+        coords = base[None, :, :] + np.repeat(wave + thermal, 3, axis=1)
+        coords = coords.astype(np.float32)
+
+    # Per-atom metadata is frame-invariant; build it once
+    num_atoms = num_molecules * 3
+    atom_meta = [water_geometry[a % 3] for a in range(num_atoms)]
+    atoms = {
+        'element': [meta['element'] for meta in atom_meta],
+        'name': [meta['name'] for meta in atom_meta],
+        'residue': ['HOH'] * num_atoms,
+        'chain': ['A'] * num_atoms,
+        'element_idx': [PALETTE_INDEX[meta['element']] for meta in atom_meta],
+    }
+
+    return create_trajectory_dict(coords, atoms, 'water_box_test')
 
 
 def generate_protein_backbone(num_residues=20, num_frames=50):
@@ -110,200 +238,169 @@ def generate_protein_backbone(num_residues=20, num_frames=50):
         dict: Trajectory data
     """
     print(f"Generating protein with {num_residues} residues, {num_frames} frames...")
-    
-    # Element colors
-    colors = {
-        'C': {'r': 0.5, 'g': 0.5, 'b': 0.5},  # Gray
-        'N': {'r': 0.0, 'g': 0.0, 'b': 1.0},  # Blue
-        'O': {'r': 1.0, 'g': 0.0, 'b': 0.0},  # Red
-        'H': {'r': 1.0, 'g': 1.0, 'b': 1.0},  # White
+
+    # Backbone atoms per residue: N, CA, C, O
+    backbone_atoms = [
+        {'element': 'N', 'name': 'N'},
+        {'element': 'C', 'name': 'CA'},
+        {'element': 'C', 'name': 'C'},
+        {'element': 'O', 'name': 'O'},
+    ]
+
+    res_idx = np.arange(num_residues, dtype=np.float32)
+    frame_idx = np.arange(num_frames, dtype=np.float32)
+
+    # Per-frame and per-(frame, residue) sine tables, computed once
+    breathing = (1.0 + 0.1 * np.sin(frame_idx * 0.2)).astype(np.float32)
+    flexibility = (0.02 * np.sin(frame_idx[:, None] * 0.15
+                                 + res_idx[None, :] * 0.5)).astype(np.float32)
+
+    if njit is not None:
+        # Helix geometry is baked into the kernel as compile-time constants
+        coords = _helix_coords(num_residues, num_frames, breathing, flexibility)
+    else:
+        # Alpha helix parameters (mirrored in _helix_coords; keep in sync)
+        rise_per_residue = 0.15  # nm
+        rotation_per_residue = 100 * np.pi / 180  # 100 degrees
+        radius = 0.23  # nm
+        angle_offsets = np.array([0.0, 0.3, 0.6, 0.8], dtype=np.float32)
+        z_offsets = np.array([0.0, 0.05, 0.10, 0.12], dtype=np.float32)
+        # N gets flexibility on x/y; O is displaced by a fixed 0.05 on x/y
+        xy_shifts = np.array([0.0, 0.0, 0.0, 0.05], dtype=np.float32)
+
+        # Position along helix: (residues, 4)
+        angles = res_idx[:, None] * rotation_per_residue + angle_offsets[None, :]
+        z = res_idx[:, None] * rise_per_residue + z_offsets[None, :]
+
+        # Broadcast everything to (frames, residues, 4)
+        r = radius * breathing[:, None, None]
+        x = r * np.cos(angles)[None, :, :] + xy_shifts[None, None, :]
+        y = r * np.sin(angles)[None, :, :] + xy_shifts[None, None, :]
+        x[:, :, 0] += flexibility
+        y[:, :, 0] += flexibility
+
+        coords = np.stack([
+            x,
+            y,
+            np.broadcast_to(z[None, :, :], x.shape),
+        ], axis=-1).reshape(num_frames, num_residues * 4, 3).astype(np.float32)
+
+    num_atoms = num_residues * 4
+    atom_meta = [backbone_atoms[a % 4] for a in range(num_atoms)]
+    atoms = {
+        'element': [meta['element'] for meta in atom_meta],
+        'name': [meta['name'] for meta in atom_meta],
+        'residue': ['ALA'] * num_atoms,
+        'chain': ['A'] * num_atoms,
+        'element_idx': [PALETTE_INDEX[meta['element']] for meta in atom_meta],
     }
-    
-    # Alpha helix parameters
-    rise_per_residue = 0.15  # nm
-    rotation_per_residue = 100 * np.pi / 180  # 100 degrees
-    radius = 0.23  # nm
-    
-    frames = []
-    
-    for frame_idx in range(num_frames):
-        atoms = []
-        
-        # Breathing motion (helix expansion/contraction)
-        breathing = 1.0 + 0.1 * np.sin(frame_idx * 0.2)
-        
-        for res_idx in range(num_residues):
-            # Position along helix
-            z = res_idx * rise_per_residue
-            angle = res_idx * rotation_per_residue
-            
-            # Add some flexibility
-            flexibility = 0.02 * np.sin(frame_idx * 0.15 + res_idx * 0.5)
-            
-            # Backbone atoms: N, CA, C, O
-            backbone_atoms = [
-                {
-                    'element': 'N',
-                    'name': 'N',
-                    'offset': np.array([
-                        radius * breathing * np.cos(angle) + flexibility,
-                        radius * breathing * np.sin(angle) + flexibility,
-                        z
-                    ])
-                },
-                {
-                    'element': 'C',
-                    'name': 'CA',
-                    'offset': np.array([
-                        radius * breathing * np.cos(angle + 0.3),
-                        radius * breathing * np.sin(angle + 0.3),
-                        z + 0.05
-                    ])
-                },
-                {
-                    'element': 'C',
-                    'name': 'C',
-                    'offset': np.array([
-                        radius * breathing * np.cos(angle + 0.6),
-                        radius * breathing * np.sin(angle + 0.6),
-                        z + 0.10
-                    ])
-                },
-                {
-                    'element': 'O',
-                    'name': 'O',
-                    'offset': np.array([
-                        radius * breathing * np.cos(angle + 0.8) + 0.05,
-                        radius * breathing * np.sin(angle + 0.8) + 0.05,
-                        z + 0.12
-                    ])
-                }
-            ]
-            
-            for atom_template in backbone_atoms:
-                atoms.append({
-                    'x': float(atom_template['offset'][0]),
-                    'y': float(atom_template['offset'][1]),
-                    'z': float(atom_template['offset'][2]),
-                    'element': atom_template['element'],
-                    'name': atom_template['name'],
-                    'residue': 'ALA',
-                    'chain': 'A',
-                    'color': colors[atom_template['element']]
-                })
-        
-        frames.append(atoms)
-    
-    return create_trajectory_dict(frames, 'protein_helix_test')
+
+    return create_trajectory_dict(coords, atoms, 'protein_helix_test')
 
 
-def generate_nanocluster(num_atoms=100, num_frames=50):
+def generate_nanocluster(num_atoms=100, num_frames=50, seed=None):
     """
     Generate a metallic nanocluster with vibrations
     
     Args:
         num_atoms: Number of atoms in cluster
         num_frames: Number of trajectory frames
+        seed: Optional seed for reproducible thermal noise
     
     Returns:
         dict: Trajectory data
     """
     print(f"Generating nanocluster with {num_atoms} atoms, {num_frames} frames...")
-    
-    # Gold color
-    color = {'r': 1.0, 'g': 0.84, 'b': 0.0}
-    
-    frames = []
-    
+
     # Generate initial FCC-like structure
     lattice_constant = 0.4  # nm
     grid_size = int(np.ceil(num_atoms ** (1/3)))
-    
-    base_positions = []
-    atom_idx = 0
-    for i in range(grid_size):
-        for j in range(grid_size):
-            for k in range(grid_size):
-                if atom_idx >= num_atoms:
-                    break
-                base_positions.append(np.array([
-                    i * lattice_constant,
-                    j * lattice_constant,
-                    k * lattice_constant
-                ]))
-                atom_idx += 1
-    
-    base_positions = np.array(base_positions)
-    
+
+    base_positions = np.stack(np.meshgrid(
+        np.arange(grid_size),
+        np.arange(grid_size),
+        np.arange(grid_size),
+        indexing='ij'
+    ), axis=-1).reshape(-1, 3)[:num_atoms].astype(np.float32) * lattice_constant
+
     # Center the cluster
     center = base_positions.mean(axis=0)
     base_positions -= center
-    
-    for frame_idx in range(num_frames):
-        atoms = []
-        
-        # Collective vibration modes
-        for idx, base_pos in enumerate(base_positions):
-            # Radial breathing mode
-            r = np.linalg.norm(base_pos)
-            if r > 0:
-                radial_dir = base_pos / r
-                breathing = 0.05 * np.sin(frame_idx * 0.3) * radial_dir
-            else:
-                breathing = np.zeros(3)
-            
-            # Thermal vibrations
-            thermal = np.random.randn(3) * 0.01
-            
-            pos = base_pos + breathing + thermal
-            
-            atoms.append({
-                'x': float(pos[0]),
-                'y': float(pos[1]),
-                'z': float(pos[2]),
-                'element': 'Au',
-                'name': 'AU',
-                'residue': 'AU',
-                'chain': 'A',
-                'color': color
-            })
-        
-        frames.append(atoms)
-    
-    return create_trajectory_dict(frames, 'nanocluster_test')
 
+    # Radial breathing mode: each atom moves along its direction from the
+    # center, scaled by a per-frame sine. Directions are frame-invariant;
+    # the where= guard keeps an atom exactly at the center stationary
+    # without a Python-level branch.
+    norms = np.linalg.norm(base_positions, axis=1, keepdims=True)
+    radial_dirs = np.divide(base_positions, norms,
+                            out=np.zeros_like(base_positions),
+                            where=norms > 0)
+
+    # Per-frame breathing amplitude table, computed once
+    frame_idx = np.arange(num_frames, dtype=np.float32)
+    breathing = (0.05 * np.sin(frame_idx * 0.3)).astype(np.float32)
+
+    # Thermal vibrations, batched for all frames
+    rng = np.random.default_rng(seed)
+    thermal = rng.standard_normal((num_frames, num_atoms, 3),
+                                  dtype=np.float32) * np.float32(0.01)
+
+    if njit is not None:
+        coords = _cluster_coords(base_positions, radial_dirs, thermal, breathing, num_frames)
+    else:
+        # (frames, atoms, 3) in one broadcast
+        coords = base_positions[None, :, :] + breathing[:, None, None] * radial_dirs[None, :, :] + thermal
+        coords = coords.astype(np.float32)
+
+    atoms = {
+        'element': ['Au'] * num_atoms,
+        'name': ['AU'] * num_atoms,
+        'residue': ['AU'] * num_atoms,
+        'chain': ['A'] * num_atoms,
+        'element_idx': [PALETTE_INDEX['Au']] * num_atoms,
+    }
+
+    return create_trajectory_dict(coords, atoms, 'nanocluster_test')
+
+
+def create_trajectory_dict(coords, atoms, source):
+    """
+    Helper to create the structure-of-arrays trajectory dictionary
+
+    Per-atom metadata (element, name, residue, chain, element_idx) is stored
+    once under 'atoms' instead of being repeated in every frame; colors live
+    in the palette in metadata, referenced by element_idx; positions are a
+    flat list of num_frames * num_atoms * 3 floats.
+
+    Args:
+        coords: (num_frames, num_atoms, 3) array of positions
+        atoms: dict of per-atom metadata lists
+        source: source label for metadata
+    """
+    first_frame = coords[0]
+    if njit is not None:
+        mn, mx, center = _bounds(first_frame)
+    else:
+        mn = first_frame.min(axis=0)
+        mx = first_frame.max(axis=0)
+        center = first_frame.mean(axis=0)
 
-def create_trajectory_dict(frames, source):
-    """Helper to create trajectory dictionary"""
-    all_coords = []
-    for atom in frames[0]:
-        all_coords.append([atom['x'], atom['y'], atom['z']])
-    all_coords = np.array(all_coords)
-    
     return {
         'metadata': {
             'source': source,
-            'num_frames': len(frames),
-            'num_atoms': len(frames[0]),
+            'format': 'soa_v1',
+            'num_frames': coords.shape[0],
+            'num_atoms': coords.shape[1],
+            'palette': PALETTE,
             'bounds': {
-                'min': {
-                    'x': float(all_coords[:, 0].min()),
-                    'y': float(all_coords[:, 1].min()),
-                    'z': float(all_coords[:, 2].min())
-                },
-                'max': {
-                    'x': float(all_coords[:, 0].max()),
-                    'y': float(all_coords[:, 1].max()),
-                    'z': float(all_coords[:, 2].max())
-                },
-                'center': {
-                    'x': float(all_coords[:, 0].mean()),
-                    'y': float(all_coords[:, 1].mean()),
-                    'z': float(all_coords[:, 2].mean())
-                }
+                'min': {'x': float(mn[0]), 'y': float(mn[1]), 'z': float(mn[2])},
+                'max': {'x': float(mx[0]), 'y': float(mx[1]), 'z': float(mx[2])},
+                'center': {'x': float(center[0]), 'y': float(center[1]),
+                           'z': float(center[2])}
             }
         },
-        'frames': frames
+        'atoms': atoms,
+        'positions': coords.ravel()
     }
 
 
@@ -315,6 +412,8 @@ def main():
                        help='Number of frames')
     parser.add_argument('--output', type=str, default='trajectory.json',
                        help='Output JSON file')
+    parser.add_argument('--seed', type=int, default=None,
+                       help='Random seed for reproducible output')
     
     args = parser.parse_args()
     
@@ -324,16 +423,17 @@ def main():
     
     # Generate data
     if args.type == 'water':
-        data = generate_water_box(num_molecules=27, num_frames=args.frames)
+        data = generate_water_box(num_molecules=27, num_frames=args.frames,
+                                  seed=args.seed)
     elif args.type == 'protein':
         data = generate_protein_backbone(num_residues=20, num_frames=args.frames)
     else:  # nanocluster
-        data = generate_nanocluster(num_atoms=100, num_frames=args.frames)
+        data = generate_nanocluster(num_atoms=100, num_frames=args.frames,
+                                    seed=args.seed)
     
     # Save to file
     output_path = Path(args.output)
-    with open(output_path, 'w') as f:
-        json.dump(data, f)
+    write_json(data, output_path)
     
     print(f"\n✓ Generated {args.type} system")
     print(f"✓ Frames: {data['metadata']['num_frames']}")
@@ -22,102 +22,149 @@ except ImportError:
     print("pip install biopython numpy")
     sys.exit(1)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 
-def parse_pdb_to_json(pdb_file, output_file=None, max_frames=100):
+def write_json(data, output_file, pretty=False):
+    """
+    Write trajectory data, using orjson (Rust, NumPy-aware) when available
+
+    pretty indents the output for human inspection; it roughly doubles the
+    file size and serialization time, so it is off by default.
+    """
+    if pretty:
+        with open(output_file, 'w') as f:
+            json.dump(data, f, indent=2, default=lambda o: o.tolist())
+    elif orjson is not None:
+        Path(output_file).write_bytes(
+            orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(output_file, 'w') as f:
+            json.dump(data, f, separators=(',', ':'),
+                      default=lambda o: o.tolist())
+
+
+# Element color palette (CPK scheme). Atoms reference palette entries by
+# index via 'element_idx'; index 0 doubles as the fallback for unknown
+# elements.
+PALETTE = [
+    {'r': 0.5, 'g': 0.5, 'b': 0.5},  # C / default: gray
+    {'r': 0.0, 'g': 0.0, 'b': 1.0},  # N: blue
+    {'r': 1.0, 'g': 0.0, 'b': 0.0},  # O: red
+    {'r': 1.0, 'g': 1.0, 'b': 0.0},  # S: yellow
+    {'r': 1.0, 'g': 0.5, 'b': 0.0},  # P: orange
+    {'r': 1.0, 'g': 1.0, 'b': 1.0},  # H: white
+]
+PALETTE_INDEX = {'C': 0, 'N': 1, 'O': 2, 'S': 3, 'P': 4, 'H': 5}
+
+
+def parse_pdb_to_json(pdb_file, output_file=None, max_frames=100, pretty=False):
     """
     Convert PDB file to JSON format for web visualization
-    
+
     Args:
         pdb_file: Path to PDB file
         output_file: Path to output JSON file (optional)
         max_frames: Maximum number of frames to extract (for multi-model PDB)
-    
+        pretty: Indent the JSON output for human inspection
+
     Returns:
         Dictionary with trajectory data
     """
     parser = PDBParser(QUIET=True)
     structure = parser.get_structure('protein', pdb_file)
-    
-    # Element color mapping (CPK coloring scheme)
-    element_colors = {
-        'C': {'r': 0.5, 'g': 0.5, 'b': 0.5},   # Carbon: gray
-        'N': {'r': 0.0, 'g': 0.0, 'b': 1.0},   # Nitrogen: blue
-        'O': {'r': 1.0, 'g': 0.0, 'b': 0.0},   # Oxygen: red
-        'S': {'r': 1.0, 'g': 1.0, 'b': 0.0},   # Sulfur: yellow
-        'P': {'r': 1.0, 'g': 0.5, 'b': 0.0},   # Phosphorus: orange
-        'H': {'r': 1.0, 'g': 1.0, 'b': 1.0},   # Hydrogen: white
-    }
-    
-    trajectory_data = {
-        'metadata': {
-            'source': str(pdb_file),
-            'num_frames': 0,
-            'num_atoms': 0,
-        },
-        'frames': []
-    }
-    
+
+    # Per-atom metadata (constant across frames) stored once, SoA-style;
+    # starts as empty lists so a header-only PDB with no models still
+    # yields a valid zero-frame trajectory
+    atoms = {key: [] for key in
+             ('element', 'name', 'residue', 'chain', 'element_idx')}
+    positions_buf = None
     frame_count = 0
-    
+    skipped_models = 0
+
     # Iterate through models (frames)
     for model in structure:
         if frame_count >= max_frames:
             break
-            
-        atoms = []
-        
-        for chain in model:
-            for residue in chain:
-                for atom in residue:
-                    coord = atom.get_coord()
-                    element = atom.element.strip() if hasattr(atom, 'element') else 'C'
-                    
-                    # Get color for element
-                    color = element_colors.get(element, {'r': 0.5, 'g': 0.5, 'b': 0.5})
-                    
-                    atom_data = {
-                        'x': float(coord[0]),
-                        'y': float(coord[1]),
-                        'z': float(coord[2]),
-                        'element': element,
-                        'name': atom.get_name(),
-                        'residue': residue.get_resname(),
-                        'chain': chain.get_id(),
-                        'color': color
-                    }
-                    atoms.append(atom_data)
-        
-        trajectory_data['frames'].append(atoms)
+
+        # Topology is the same in every model; walk the hierarchy once to
+        # record it, then handle later models with bulk coordinate copies
+        if frame_count == 0:
+            # Cheap count pass so the metadata lists can be preallocated
+            # instead of growing by repeated append
+            n = sum(1 for _ in model.get_atoms())
+            for key in atoms:
+                atoms[key] = [None] * n
+
+            a = 0
+            for chain in model:
+                for residue in chain:
+                    for atom in residue:
+                        element = atom.element.strip() if hasattr(atom, 'element') else 'C'
+                        atoms['element'][a] = element
+                        atoms['name'][a] = atom.get_name()
+                        atoms['residue'][a] = residue.get_resname()
+                        atoms['chain'][a] = chain.get_id()
+                        atoms['element_idx'][a] = PALETTE_INDEX.get(element, 0)
+                        a += 1
+
+            positions_buf = np.empty((max_frames, n, 3), dtype=np.float32)
+
+        # Biopython coords are already small NumPy arrays; stack the whole
+        # model in one call instead of boxing x/y/z per atom
+        model_coords = np.array(
+            [atom.get_coord() for atom in model.get_atoms()], dtype=np.float32)
+
+        # NMR ensembles can contain models with differing atom counts
+        # (e.g. 1BQ0); the shared buffer is sized for the first model, so
+        # skip any model that does not match it
+        if model_coords.shape[0] != positions_buf.shape[1]:
+            skipped_models += 1
+            continue
+
+        positions_buf[frame_count] = model_coords
         frame_count += 1
-    
-    # Update metadata
-    trajectory_data['metadata']['num_frames'] = len(trajectory_data['frames'])
-    if trajectory_data['frames']:
-        trajectory_data['metadata']['num_atoms'] = len(trajectory_data['frames'][0])
-    
-    # Calculate bounding box for camera positioning
-    if trajectory_data['frames']:
-        all_coords = []
-        for atom in trajectory_data['frames'][0]:
-            all_coords.append([atom['x'], atom['y'], atom['z']])
-        
-        all_coords = np.array(all_coords)
+
+    if skipped_models:
+        print(f"⚠️  Skipped {skipped_models} model(s) whose atom count "
+              f"differs from the first model's {positions_buf.shape[1]}")
+
+    num_atoms = len(atoms['element'])
+    positions = positions_buf[:frame_count].ravel() if frame_count > 0 else []
+
+    trajectory_data = {
+        'metadata': {
+            'source': str(pdb_file),
+            'format': 'soa_v1',
+            'num_frames': frame_count,
+            'num_atoms': num_atoms,
+            'palette': PALETTE,
+        },
+        'atoms': atoms,
+        'positions': positions
+    }
+
+    # Calculate bounding box for camera positioning; axis-wise reductions
+    # make one pass per statistic instead of one per column
+    if frame_count > 0:
+        all_coords = positions_buf[0]
+        mn = all_coords.min(axis=0)
+        mx = all_coords.max(axis=0)
+        center = all_coords.mean(axis=0)
         trajectory_data['metadata']['bounds'] = {
-            'min': {'x': float(all_coords[:, 0].min()), 
-                   'y': float(all_coords[:, 1].min()), 
-                   'z': float(all_coords[:, 2].min())},
-            'max': {'x': float(all_coords[:, 0].max()), 
-                   'y': float(all_coords[:, 1].max()), 
-                   'z': float(all_coords[:, 2].max())},
-            'center': {'x': float(all_coords[:, 0].mean()), 
-                      'y': float(all_coords[:, 1].mean()), 
-                      'z': float(all_coords[:, 2].mean())}
+            'min': {'x': float(mn[0]), 'y': float(mn[1]), 'z': float(mn[2])},
+            'max': {'x': float(mx[0]), 'y': float(mx[1]), 'z': float(mx[2])},
+            'center': {'x': float(center[0]), 'y': float(center[1]),
+                       'z': float(center[2])}
         }
     
     # Write to file if specified
     if output_file:
-        with open(output_file, 'w') as f:
-            json.dump(trajectory_data, f, indent=2)
+        write_json(trajectory_data, output_file, pretty=pretty)
         print(f"✅ Converted {pdb_file} to {output_file}")
         print(f"   Frames: {trajectory_data['metadata']['num_frames']}")
         print(f"   Atoms per frame: {trajectory_data['metadata']['num_atoms']}")
@@ -130,81 +177,74 @@ def create_simple_water_box():
     Generate a simple water box for testing (without requiring OpenMM)
     Creates a 3x3x3 grid of water molecules
     """
-    trajectory_data = {
-        'metadata': {
-            'source': 'generated_water_box',
-            'num_frames': 10,
-            'num_atoms': 0,
-        },
-        'frames': []
-    }
-    
     # Water molecule geometry (Å)
     water_template = [
         {'element': 'O', 'offset': [0.0, 0.0, 0.0]},
         {'element': 'H', 'offset': [0.96, 0.0, 0.0]},
         {'element': 'H', 'offset': [-0.24, 0.93, 0.0]},
     ]
-    
-    # Generate 10 frames with slight motion
-    for frame in range(10):
-        atoms = []
-        
-        # Create 3x3x3 grid of water molecules
-        for i in range(3):
-            for j in range(3):
-                for k in range(3):
-                    base_x = i * 3.0
-                    base_y = j * 3.0
-                    base_z = k * 3.0
-                    
-                    # Add thermal motion
-                    motion_x = np.sin(frame * 0.3 + i) * 0.1
-                    motion_y = np.sin(frame * 0.3 + j) * 0.1
-                    motion_z = np.sin(frame * 0.3 + k) * 0.1
-                    
-                    # Add each atom in water molecule
-                    for atom_template in water_template:
-                        element = atom_template['element']
-                        color = {
-                            'O': {'r': 1.0, 'g': 0.0, 'b': 0.0},
-                            'H': {'r': 1.0, 'g': 1.0, 'b': 1.0}
-                        }[element]
-                        
-                        atoms.append({
-                            'x': base_x + atom_template['offset'][0] + motion_x,
-                            'y': base_y + atom_template['offset'][1] + motion_y,
-                            'z': base_z + atom_template['offset'][2] + motion_z,
-                            'element': element,
-                            'name': element,
-                            'residue': 'WAT',
-                            'chain': 'A',
-                            'color': color
-                        })
-        
-        trajectory_data['frames'].append(atoms)
-    
-    trajectory_data['metadata']['num_atoms'] = len(trajectory_data['frames'][0])
-    
-    return trajectory_data
+
+    # Per-atom metadata, stored once for all frames (3x3x3 grid of waters);
+    # built in bulk rather than by per-atom append
+    elements = [t['element'] for _ in range(27) for t in water_template]
+    num_atoms = len(elements)
+    atoms = {
+        'element': elements,
+        'name': list(elements),
+        'residue': ['WAT'] * num_atoms,
+        'chain': ['A'] * num_atoms,
+        'element_idx': [PALETTE_INDEX[element] for element in elements],
+    }
+
+    # Thermal motion only depends on (frame, grid index); compute the
+    # sine table once instead of per molecule
+    motion = (np.sin(np.arange(10)[:, None] * 0.3 + np.arange(3)[None, :]) * 0.1
+              ).astype(np.float32)
+
+    # 3x3x3 grid of water molecules; base positions are frame-invariant,
+    # so build them once instead of inside the frame loop
+    ijk = np.array([(i, j, k)
+                    for i in range(3) for j in range(3) for k in range(3)])
+    offsets = np.array([t['offset'] for t in water_template], dtype=np.float32)
+    base = (ijk[:, None, :] * 3.0 + offsets[None, :, :]).reshape(-1, 3)
+
+    # Generate 10 frames with slight motion; the per-molecule displacement
+    # applies to all 3 atoms of each water
+    positions = base[None, :, :] + np.repeat(motion[:, ijk], 3, axis=1)
+
+    return {
+        'metadata': {
+            'source': 'generated_water_box',
+            'format': 'soa_v1',
+            'num_frames': 10,
+            'num_atoms': len(atoms['element']),
+            'palette': PALETTE,
+        },
+        'atoms': atoms,
+        'positions': positions.astype(np.float32).ravel()
+    }
 
 
 if __name__ == '__main__':
+    # Output is compact by default; --pretty restores indented JSON
+    pretty = '--pretty' in sys.argv
+    if pretty:
+        sys.argv.remove('--pretty')
+
     if len(sys.argv) < 2:
         print("Usage:")
-        print("  python pdb_to_json.py input.pdb [output.json]")
+        print("  python pdb_to_json.py input.pdb [output.json] [--pretty]")
         print("\nOr generate test water box:")
         print("  python pdb_to_json.py --generate-water output.json")
         sys.exit(1)
-    
+
     if sys.argv[1] == '--generate-water':
         output_file = sys.argv[2] if len(sys.argv) > 2 else 'water_box.json'
         print("Generating test water box...")
         data = create_simple_water_box()
-        
-        with open(output_file, 'w') as f:
-            json.dump(data, f, indent=2)
-        
+
+        write_json(data, output_file, pretty=pretty)
+
         print(f"✅ Generated {output_file}")
         print(f"   Frames: {data['metadata']['num_frames']}")
         print(f"   Atoms per frame: {data['metadata']['num_atoms']}")
@@ -216,4 +256,4 @@ if __name__ == '__main__':
             print(f"Error: File not found: {input_file}")
             sys.exit(1)
         
-        parse_pdb_to_json(input_file, output_file)
+        parse_pdb_to_json(input_file, output_file, pretty=pretty)
@@ -13,6 +13,8 @@ Usage:
 
 import argparse
 import json
+import tempfile
+from collections import namedtuple
 from pathlib import Path
 import sys
 
@@ -28,6 +30,48 @@ except ImportError:
     print("pip install openmm")
     sys.exit(1)
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def write_json(data, output_file, pretty=False):
+    """
+    Write trajectory data, using orjson (Rust, NumPy-aware) when available
+
+    pretty indents the output for human inspection; it roughly doubles the
+    file size and serialization time, so it is off by default.
+    """
+    if pretty:
+        with open(output_file, 'w') as f:
+            json.dump(data, f, indent=2, default=lambda o: o.tolist())
+    elif orjson is not None:
+        Path(output_file).write_bytes(
+            orjson.dumps(data, option=orjson.OPT_SERIALIZE_NUMPY))
+    else:
+        with open(output_file, 'w') as f:
+            json.dump(data, f, separators=(',', ':'),
+                      default=lambda o: o.tolist())
+
+
+# Element color palette (CPK scheme). Atoms reference palette entries by
+# index via 'element_idx'; index 0 doubles as the fallback for unknown
+# elements.
+PALETTE = [
+    {'r': 0.5, 'g': 0.5, 'b': 0.5},  # C / default: gray
+    {'r': 0.0, 'g': 0.0, 'b': 1.0},  # N: blue
+    {'r': 1.0, 'g': 0.0, 'b': 0.0},  # O: red
+    {'r': 1.0, 'g': 1.0, 'b': 0.0},  # S: yellow
+    {'r': 1.0, 'g': 0.5, 'b': 0.0},  # P: orange
+    {'r': 1.0, 'g': 1.0, 'b': 1.0},  # H: white
+]
+PALETTE_INDEX = {'C': 0, 'N': 1, 'O': 2, 'S': 3, 'P': 4, 'H': 5}
+
+# Per-atom topology record. A namedtuple keeps the tuple-sized memory
+# footprint (~72 bytes vs ~232 for a dict) while giving the fields names.
+AtomMeta = namedtuple('AtomMeta', 'element name residue chain')
+
 
 def download_sample_pdb():
     """Download a sample PDB file if none exists"""
@@ -130,9 +174,11 @@ def run_simulation(topology, positions, num_steps=1000, output_interval=10, temp
         num_steps: Number of simulation steps
         output_interval: Save frame every N steps
         temperature: Temperature in Kelvin
-    
+
     Returns:
-        list: Trajectory frames
+        tuple: (topo_meta, positions) where topo_meta is a list of per-atom
+        AtomMeta records and positions is a (num_frames, num_atoms, 3)
+        float32 array
     """
     print(f"\n=== Running MD Simulation ===")
     print(f"Steps: {num_steps}")
@@ -172,100 +218,91 @@ def run_simulation(topology, positions, num_steps=1000, output_interval=10, temp
     
     # Run simulation and collect frames
     print(f"Running production MD...")
-    frames = []
-    
+
+    # Topology metadata never changes during the trajectory; resolve the
+    # Python attribute chain once instead of once per atom per frame
+    topo_meta = [AtomMeta(atom.element.symbol if atom.element else 'C',
+                          atom.name, atom.residue.name, atom.residue.chain.id)
+                 for atom in topology.atoms()]
+
+    num_saved = len(range(0, num_steps, output_interval))
+
+    # Stream each frame to a scratch file as it is produced instead of
+    # accumulating the whole trajectory in RAM; the result is handed back
+    # as a read-only memory map over that file
+    scratch = tempfile.NamedTemporaryFile(prefix='frames_', suffix='.f32',
+                                          delete=False)
+
     from tqdm import tqdm
-    for step in tqdm(range(0, num_steps, output_interval)):
-        simulation.step(output_interval)
-        
-        # Get current state
-        state = simulation.context.getState(getPositions=True)
-        # Convert positions to nanometers strips units and returns list of Vec3 floats
-        positions = state.getPositions().value_in_unit(nanometers)
-        
-        # Convert to list format
-        frame_atoms = []
-        for atom, pos in zip(topology.atoms(), positions):
-            frame_atoms.append({
-                'x': float(pos.x),
-                'y': float(pos.y),
-                'z': float(pos.z),
-                'element': atom.element.symbol if atom.element else 'C',
-                'name': atom.name,
-                'residue': atom.residue.name,
-                'chain': atom.residue.chain.id
-            })
-        
-        frames.append(frame_atoms)
-    
-    print(f"✓ Simulation complete! Generated {len(frames)} frames")
-    
-    return frames
+    with scratch:
+        for step in tqdm(range(0, num_steps, output_interval)):
+            simulation.step(output_interval)
+
+            # Get current state
+            state = simulation.context.getState(getPositions=True)
+            # asNumpy=True returns one (N, 3) array; stripping units is then a
+            # single C-level scale instead of N Vec3 conversions
+            positions = state.getPositions(asNumpy=True).value_in_unit(nanometers)
 
+            scratch.write(np.ascontiguousarray(positions, dtype=np.float32).tobytes())
 
-def save_trajectory(frames, output_file='trajectory.json'):
+    positions_buf = np.memmap(scratch.name, dtype=np.float32, mode='r',
+                              shape=(num_saved, len(topo_meta), 3))
+
+    print(f"✓ Simulation complete! Generated {num_saved} frames")
+
+    return topo_meta, positions_buf
+
+
+def save_trajectory(topo_meta, coords, output_file='trajectory.json'):
     """
     Save trajectory to JSON file
-    
+
     Args:
-        frames: List of frames
+        topo_meta: Per-atom AtomMeta records
+        coords: (num_frames, num_atoms, 3) array of positions
         output_file: Output JSON file path
     """
     print(f"\n=== Saving trajectory to {output_file} ===")
-    
-    # Element color mapping (CPK coloring)
-    element_colors = {
-        'C': {'r': 0.5, 'g': 0.5, 'b': 0.5},
-        'N': {'r': 0.0, 'g': 0.0, 'b': 1.0},
-        'O': {'r': 1.0, 'g': 0.0, 'b': 0.0},
-        'S': {'r': 1.0, 'g': 1.0, 'b': 0.0},
-        'P': {'r': 1.0, 'g': 0.5, 'b': 0.0},
-        'H': {'r': 1.0, 'g': 1.0, 'b': 1.0},
+
+    # Per-atom metadata is identical in every frame; store it once, SoA-style
+    atoms = {
+        'element': [meta.element for meta in topo_meta],
+        'name': [meta.name for meta in topo_meta],
+        'residue': [meta.residue for meta in topo_meta],
+        'chain': [meta.chain for meta in topo_meta],
+        'element_idx': [PALETTE_INDEX.get(meta.element, 0) for meta in topo_meta],
     }
-    
-    # Add colors to atoms
-    for frame in frames:
-        for atom in frame:
-            element = atom['element']
-            atom['color'] = element_colors.get(element, {'r': 0.5, 'g': 0.5, 'b': 0.5})
-    
-    # Calculate bounds
-    all_coords = []
-    for atom in frames[0]:
-        all_coords.append([atom['x'], atom['y'], atom['z']])
-    all_coords = np.array(all_coords)
-    
+
+    # Axis-wise reductions: one pass per statistic instead of one per column
+    all_coords = coords[0]
+    mn = all_coords.min(axis=0)
+    mx = all_coords.max(axis=0)
+    center = all_coords.mean(axis=0)
+
     trajectory_data = {
         'metadata': {
             'source': 'openmm_simulation',
-            'num_frames': len(frames),
-            'num_atoms': len(frames[0]) if frames else 0,
+            'format': 'soa_v1',
+            'num_frames': coords.shape[0],
+            'num_atoms': coords.shape[1],
+            'palette': PALETTE,
             'bounds': {
-                'min': {
-                    'x': float(all_coords[:, 0].min()),
-                    'y': float(all_coords[:, 1].min()),
-                    'z': float(all_coords[:, 2].min())
-                },
-                'max': {
-                    'x': float(all_coords[:, 0].max()),
-                    'y': float(all_coords[:, 1].max()),
-                    'z': float(all_coords[:, 2].max())
-                },
-                'center': {
-                    'x': float(all_coords[:, 0].mean()),
-                    'y': float(all_coords[:, 1].mean()),
-                    'z': float(all_coords[:, 2].mean())
-                }
+                'min': {'x': float(mn[0]), 'y': float(mn[1]), 'z': float(mn[2])},
+                'max': {'x': float(mx[0]), 'y': float(mx[1]), 'z': float(mx[2])},
+                'center': {'x': float(center[0]), 'y': float(center[1]),
+                           'z': float(center[2])}
             }
         },
-        'frames': frames
+        'atoms': atoms,
+        # np.asarray drops the memmap subclass, which orjson does not accept
+        'positions': np.asarray(coords).ravel()
     }
-    
-    with open(output_file, 'w') as f:
-        json.dump(trajectory_data, f)
-    
-    print(f"✓ Saved {len(frames)} frames")
-    print(f"✓ Atoms per frame: {len(frames[0])}")
+
+    write_json(trajectory_data, output_file)
+
+    print(f"✓ Saved {coords.shape[0]} frames")
+    print(f"✓ Atoms per frame: {coords.shape[1]}")
     print(f"✓ File size: {Path(output_file).stat().st_size / 1024 / 1024:.2f} MB")
 
 
@@ -300,16 +337,20 @@ def main():
         topology, positions = create_protein_system(pdb_file)
     
     # Run simulation
-    frames = run_simulation(
-        topology, 
-        positions, 
+    topo_meta, coords = run_simulation(
+        topology,
+        positions,
         num_steps=args.steps,
         output_interval=args.interval,
         temperature=args.temp
     )
-    
+
     # Save trajectory
-    save_trajectory(frames, args.output)
+    save_trajectory(topo_meta, coords, args.output)
+
+    # The streamed scratch file is no longer needed once the JSON is written
+    if isinstance(coords, np.memmap):
+        Path(coords.filename).unlink(missing_ok=True)
     
     print("\n" + "=" * 60)
     print("✓ Simulation complete!")
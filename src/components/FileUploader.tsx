@@ -1,6 +1,7 @@
 import React, { useCallback } from 'react';
 import { useDropzone } from 'react-dropzone';
 import { parsePDB } from '../utils/pdbParser';
+import { normalizeTrajectory } from '../utils/trajectoryLoader';
 import { TrajectoryData } from '../types/simulation';
 
 interface FileUploaderProps {
@@ -25,12 +26,16 @@ export default function FileUploader({ onDataLoaded, onUploadStart, onUploadEnd
                 // Small timeout to allow UI to render the loading state before blocking
                 setTimeout(() => {
                     try {
-                        const data = parsePDB(textStr, file.name);
+                        // Trajectory JSON from the Python pipeline (SoA or
+                        // pre-expanded) vs a raw PDB structure
+                        const data = file.name.toLowerCase().endsWith('.json')
+                            ? normalizeTrajectory(JSON.parse(textStr))
+                            : parsePDB(textStr, file.name);
                         console.log("Parsed Data:", data);
                         onDataLoaded(data);
                     } catch (e) {
-                        console.error("Failed to parse PDB:", e);
-                        alert("Failed to parse PDB file. Check format.");
+                        console.error("Failed to parse file:", e);
+                        alert("Failed to parse file. Check format.");
                     } finally {
                         if (onUploadEnd) onUploadEnd();
                     }
@@ -40,7 +45,7 @@ export default function FileUploader({ onDataLoaded, onUploadStart, onUploadEnd
         });
     }, [onDataLoaded, onUploadStart, onUploadEnd]);
 
-    const { getRootProps, getInputProps, isDragActive } = useDropzone({ onDrop, accept: { 'chemical/x-pdb': ['.pdb'] } });
+    const { getRootProps, getInputProps, isDragActive } = useDropzone({ onDrop, accept: { 'chemical/x-pdb': ['.pdb'], 'application/json': ['.json'] } });
 
     return (
         <div className="absolute top-4 left-4 z-50 w-64">
@@ -54,10 +59,10 @@ export default function FileUploader({ onDataLoaded, onUploadStart, onUploadEnd
                 <input {...getInputProps()} />
                 <div className="text-center text-white/80 font-medium text-sm">
                     {isDragActive ? (
-                        <p className="text-emerald-300">Drop PDB here...</p>
+                        <p className="text-emerald-300">Drop file here...</p>
                     ) : (
                         <div>
-                            <p>📂 Drop PDB File</p>
+                            <p>📂 Drop PDB / Trajectory JSON</p>
                             <p className="text-xs text-white/40 mt-1">Visualize new protein</p>
                         </div>
                     )}
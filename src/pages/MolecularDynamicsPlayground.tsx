@@ -3,9 +3,12 @@ import MolecularView from '../components/MolecularView';
 import Controls from '../components/Controls';
 import FileUploader from '../components/FileUploader';
 import { TrajectoryData } from '../types/simulation';
+import { normalizeTrajectory } from '../utils/trajectoryLoader';
 import defaultTrajectoryData from '../data/4HHB.json';
 
-const defaultTrajectory = defaultTrajectoryData as unknown as TrajectoryData;
+// Expands SoA ('soa_v1') payloads from the Python pipeline; pre-expanded
+// trajectories pass through unchanged
+const defaultTrajectory = normalizeTrajectory(defaultTrajectoryData);
 
 export default function MolecularDynamicsPlayground() {
     const [trajectory, setTrajectory] = useState<TrajectoryData>(defaultTrajectory);
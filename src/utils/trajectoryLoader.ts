@@ -0,0 +1,73 @@
+import { TrajectoryData, Atom, RGBColor, SimulationMetadata } from "../types/simulation";
+
+/**
+ * Structure-of-Arrays trajectory format ('soa_v1') emitted by the Python
+ * generators. Per-atom metadata is stored once and coordinates are a flat
+ * float list of num_frames * num_atoms * 3 values, which is far smaller
+ * than repeating atom dicts in every frame.
+ */
+interface SoaAtoms {
+    element: string[];
+    name: string[];
+    residue: string[];
+    chain: string[];
+    // Either explicit per-atom colors or indices into metadata.palette
+    colors?: RGBColor[];
+    element_idx?: number[];
+}
+
+interface SoaTrajectory {
+    metadata: SimulationMetadata & { format?: string; palette?: RGBColor[] };
+    atoms: SoaAtoms;
+    positions: number[];
+}
+
+const FALLBACK_COLOR: RGBColor = { r: 0.8, g: 0.0, b: 0.8 };
+
+/**
+ * Expands an 'soa_v1' trajectory into the per-frame Atom[][] shape the
+ * viewer components consume. Already-expanded trajectories pass through
+ * untouched, so this can wrap any JSON load.
+ */
+export function normalizeTrajectory(data: unknown): TrajectoryData {
+    const soa = data as SoaTrajectory;
+    if (soa?.metadata?.format !== 'soa_v1' || !soa.atoms || !soa.positions) {
+        return data as TrajectoryData;
+    }
+
+    const { metadata, atoms, positions } = soa;
+    const numFrames = metadata.num_frames;
+    const numAtoms = metadata.num_atoms;
+
+    // Resolve colors once per atom, not once per atom per frame
+    const palette = metadata.palette;
+    const colors: RGBColor[] = atoms.element.map((_, i) => {
+        if (atoms.colors) return atoms.colors[i];
+        if (palette && atoms.element_idx) {
+            return palette[atoms.element_idx[i]] ?? FALLBACK_COLOR;
+        }
+        return FALLBACK_COLOR;
+    });
+
+    const frames: Atom[][] = [];
+    for (let f = 0; f < numFrames; f++) {
+        const frame: Atom[] = new Array(numAtoms);
+        const base = f * numAtoms * 3;
+        for (let i = 0; i < numAtoms; i++) {
+            const k = base + i * 3;
+            frame[i] = {
+                x: positions[k],
+                y: positions[k + 1],
+                z: positions[k + 2],
+                element: atoms.element[i],
+                name: atoms.name[i],
+                residue: atoms.residue[i],
+                chain: atoms.chain[i],
+                color: colors[i],
+            };
+        }
+        frames.push(frame);
+    }
+
+    return { metadata, frames };
+}